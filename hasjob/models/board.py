@@ -1,4 +1,5 @@
 from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.ext.hybrid import hybrid_property
 
 from flask import Markup, url_for
 from werkzeug.utils import cached_property
@@ -248,11 +249,11 @@ class Board(BaseNameMixin, db.Model):
     def __repr__(self):
         return f'<Board {self.name} "{self.title}">'
 
-    @property
+    @hybrid_property
     def is_root(self):
         return self.name == 'www'
 
-    @property
+    @hybrid_property
     def not_root(self):
         return self.name != 'www'
 
@@ -1,6 +1,11 @@
-from sqlalchemy import DDL, event
+from itertools import chain
+import hashlib
+import json
+
+from sqlalchemy import DDL, event, inspect
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import validates
 
 from ..extapi import location_geodata
 from . import BaseScopedNameMixin, db
@@ -12,6 +17,13 @@ from .tag import Tag
 
 __all__ = ['Filterset']
 
+#: Name of the unique constraint that rejects duplicate criteria within a board
+FILTERSET_CRITERIA_CONSTRAINT = 'filterset_board_id_filters_hash_key'
+#: Error raised when a commit would duplicate filter criteria within a board
+FILTERSET_DUPLICATE_MESSAGE = (
+    "There already exists a filter set with this filter criteria"
+)
+
 
 filterset_jobtype_table = db.Table(
     'filterset_jobtype',
@@ -87,7 +99,7 @@ class Filterset(BaseScopedNameMixin, db.Model):
 
     __tablename__ = 'filterset'
 
-    board_id = db.Column(None, db.ForeignKey('board.id'), nullable=False, index=True)
+    board_id = db.Column(None, db.ForeignKey('board.id'), nullable=False)
     board = db.relationship(Board)
     parent = db.synonym('board')
 
@@ -107,38 +119,97 @@ class Filterset(BaseScopedNameMixin, db.Model):
     geonameids = db.Column(
         postgresql.ARRAY(db.Integer(), dimensions=1), default=[], nullable=False
     )
-    remote_location = db.Column(db.Boolean, default=False, nullable=False, index=True)
-    pay_currency = db.Column(db.CHAR(3), nullable=True, index=True)
-    pay_cash = db.Column(db.Integer, nullable=True, index=True)
-    equity = db.Column(db.Boolean, nullable=False, default=False, index=True)
-    keywords = db.Column(db.Unicode(250), nullable=False, default='', index=True)
+    remote_location = db.Column(db.Boolean, default=False, nullable=False)
+    pay_currency = db.Column(db.CHAR(3), nullable=True)
+    pay_cash = db.Column(db.Integer, nullable=True)
+    equity = db.Column(db.Boolean, nullable=False, default=False)
+    keywords = db.Column(db.Unicode(250), nullable=False, default='')
+    #: Filter criteria from the columns and relationships above, as of the last
+    #: flush, in the form returned by :meth:`to_filters` with sorted lists
+    filters = db.Column(postgresql.JSONB, nullable=False)
+    #: Hash of the filter criteria, from :meth:`hash_filters`
+    filters_hash = db.Column(db.CHAR(64), nullable=False)
+
+    __table_args__ = (
+        # Deferred to commit so that two filtersets can swap criteria
+        db.UniqueConstraint(
+            'board_id',
+            'filters_hash',
+            name=FILTERSET_CRITERIA_CONSTRAINT,
+            deferrable=True,
+            initially='DEFERRED',
+        ),
+    )
 
     def __repr__(self):
         return f'<Filterset {self.board.title} "{self.title}">'
 
+    @validates('geonameids')
+    def _sort_geonameids(self, key, value):
+        # Sorted once on assignment, so the stored filters are already in order
+        return sorted(value) if value else value
+
     @classmethod
-    def get(cls, board, name):
-        return cls.query.filter(cls.board == board, cls.name == name).one_or_none()
+    def get(cls, board, name, options=()):
+        return (
+            cls.query.filter(cls.board == board, cls.name == name)
+            .options(*options)
+            .one_or_none()
+        )
+
+    @classmethod
+    def url_rows(cls):
+        """
+        Return (name, updated_at, board_name, not_root) rows for all filtersets,
+        without loading full Filterset objects
+        """
+        return (
+            db.session.query(
+                cls.name,
+                cls.updated_at,
+                Board.name.label('board_name'),
+                Board.not_root.label('not_root'),
+            )
+            .join(cls.board)
+            .all()
+        )
 
     def url_for(self, action='view', _external=True, **kwargs):
         kwargs.setdefault('subdomain', self.board.name if self.board.not_root else None)
         return super().url_for(action, name=self.name, _external=_external, **kwargs)
 
     def to_filters(self, translate_geonameids=False):
-        location_names = []
-        if translate_geonameids and self.geonameids:
-            location_dict = location_geodata(self.geonameids)
-            for geonameid in self.geonameids:
-                # location_geodata returns related geonames as well
-                # so we prune it down to our original list
-                location_names.append(location_dict[geonameid]['name'])
-
+        """
+        Return the filter criteria from the stored :attr:`filters` column, without
+        loading the types, categories, tags and domains relationships
+        """
+        # Copy the lists so that callers can't modify the stored filters
+        filters = {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in self._stored_filters().items()
+        }
+        if translate_geonameids and filters['l']:
+            location_dict = location_geodata(filters['l'])
+            # location_geodata returns related geonames as well
+            # so we prune it down to our original list
+            filters['l'] = [
+                location_dict[geonameid]['name'] for geonameid in filters['l']
+            ]
+        return filters
+
+    def _stored_filters(self):
+        # Filtersets with unflushed changes have nothing or stale criteria stored
+        if self.filters is None or inspect(self).modified:
+            return self._current_filters()
+        return self.filters
+
+    def _current_filters(self):
         return {
-            't': [jobtype.name for jobtype in self.types],
-            'c': [jobcategory.name for jobcategory in self.categories],
-            'k': [tag.name for tag in self.tags],
-            'd': [domain.name for domain in self.domains],
-            'l': location_names if translate_geonameids else self.geonameids,
+            't': sorted(jobtype.name for jobtype in self.types),
+            'c': sorted(jobcategory.name for jobcategory in self.categories),
+            'k': sorted(tag.name for tag in self.tags),
+            'd': sorted(domain.name for domain in self.domains),
+            'l': sorted(self.geonameids or []),
             'currency': self.pay_currency,
             'pay': self.pay_cash,
             'equity': self.equity,
@@ -146,142 +217,87 @@ class Filterset(BaseScopedNameMixin, db.Model):
             'q': self.keywords,
         }
 
-    @classmethod
-    def from_filters(cls, board, filters):
-        basequery = cls.query.filter(cls.board == board)
-
-        if filters.get('t'):
-            basequery = (
-                basequery.join(filterset_jobtype_table)
-                .join(JobType)
-                .filter(JobType.name.in_(filters['t']))
-                .group_by(Filterset.id)
-                .having(
-                    db.func.count(filterset_jobtype_table.c.filterset_id)
-                    == len(filters['t'])
-                )
-            )
-        else:
-            basequery = basequery.filter(
-                ~(
-                    db.exists(
-                        db.select([1]).where(
-                            Filterset.id == filterset_jobtype_table.c.filterset_id
-                        )
-                    )
-                )
-            )
-
-        if filters.get('c'):
-            basequery = (
-                basequery.join(filterset_jobcategory_table)
-                .join(JobCategory)
-                .filter(JobCategory.name.in_(filters['c']))
-                .group_by(Filterset.id)
-                .having(
-                    db.func.count(filterset_jobcategory_table.c.filterset_id)
-                    == len(filters['c'])
-                )
-            )
-        else:
-            basequery = basequery.filter(
-                ~(
-                    db.exists(
-                        db.select([1]).where(
-                            Filterset.id == filterset_jobcategory_table.c.filterset_id
-                        )
-                    )
-                )
-            )
-
-        if filters.get('k'):
-            basequery = (
-                basequery.join(filterset_tag_table)
-                .join(Tag)
-                .filter(Tag.name.in_(filters['k']))
-                .group_by(Filterset.id)
-                .having(
-                    db.func.count(filterset_tag_table.c.filterset_id)
-                    == len(filters['k'])
-                )
-            )
-        else:
-            basequery = basequery.filter(
-                ~(
-                    db.exists(
-                        db.select([1]).where(
-                            Filterset.id == filterset_tag_table.c.filterset_id
-                        )
-                    )
-                )
-            )
+    @staticmethod
+    def canonical_filters(filters):
+        """
+        Return the filter criteria normalized for :meth:`hash_filters`, with sorted
+        lists and defaults for missing values. Pay and currency are kept as they
+        are, since the filterset view filters on pay even without a currency
+        """
+        return {
+            't': sorted(filters.get('t') or []),
+            'c': sorted(filters.get('c') or []),
+            'k': sorted(filters.get('k') or []),
+            'd': sorted(filters.get('d') or []),
+            'l': sorted(filters.get('l') or []),
+            'currency': filters.get('currency'),
+            'pay': filters.get('pay'),
+            'equity': bool(filters.get('equity')),
+            'anywhere': bool(filters.get('anywhere')),
+            'q': filters.get('q') or '',
+        }
 
-        if filters.get('d'):
-            basequery = (
-                basequery.join(filterset_domain_table)
-                .join(Domain)
-                .filter(Domain.name.in_(filters['d']))
-                .group_by(Filterset.id)
-                .having(
-                    db.func.count(filterset_domain_table.c.filterset_id)
-                    == len(filters['d'])
-                )
-            )
-        else:
-            basequery = basequery.filter(
-                ~(
-                    db.exists(
-                        db.select([1]).where(
-                            Filterset.id == filterset_domain_table.c.filterset_id
-                        )
-                    )
-                )
-            )
+    @classmethod
+    def hash_filters(cls, filters):
+        """
+        Return a hash of the filter criteria. Equivalent filters have the same hash
+        """
+        return hashlib.sha256(
+            json.dumps(cls.canonical_filters(filters), sort_keys=True).encode('utf-8')
+        ).hexdigest()
 
-        if filters.get('l'):
-            basequery = basequery.filter(cls.geonameids == sorted(filters['l']))
-        else:
-            basequery = basequery.filter(cls.geonameids == [])
+    @classmethod
+    def from_filters(cls, board, filters):
+        # A single probe of the unique index on (board_id, filters_hash)
+        return cls.query.filter(
+            cls.board == board, cls.filters_hash == cls.hash_filters(filters)
+        ).one_or_none()
 
-        if filters.get('equity'):
-            basequery = basequery.filter(cls.equity.is_(True))
-        else:
-            basequery = basequery.filter(cls.equity.is_(False))
 
-        if filters.get('pay') and filters.get('currency'):
-            basequery = basequery.filter(
-                cls.pay_cash == filters['pay'], cls.pay_currency == filters['currency']
-            )
-        else:
-            basequery = basequery.filter(
-                cls.pay_cash.is_(None), cls.pay_currency.is_(None)
+@event.listens_for(db.session, 'before_commit')
+def _check_duplicate_filtersets(session):
+    """
+    Reject new or changed filtersets whose criteria duplicate another's in the
+    same board, with one query per commit instead of one per filterset
+    """
+    filtersets = [
+        obj for obj in chain(session.new, session.dirty) if isinstance(obj, Filterset)
+    ]
+    if not filtersets:
+        return
+
+    with session.no_autoflush:
+        pending = {}
+        for filterset in filtersets:
+            key = (
+                filterset.board.id,
+                Filterset.hash_filters(filterset._current_filters()),
             )
+            if key in pending:
+                raise ValueError(FILTERSET_DUPLICATE_MESSAGE)
+            pending[key] = filterset
+        # Filtersets changed in this commit were checked by their new criteria above,
+        # so their rows in the database (with old criteria) are not duplicates
+        pending_ids = {
+            filterset.id for filterset in pending.values() if filterset.id is not None
+        }
 
-        if filters.get('q'):
-            basequery = basequery.filter(cls.keywords == filters['q'])
-        else:
-            basequery = basequery.filter(cls.keywords == '')
-
-        if filters.get('anywhere'):
-            basequery = basequery.filter(cls.remote_location.is_(True))
-        else:
-            basequery = basequery.filter(cls.remote_location.is_(False))
-
-        return basequery.one_or_none()
+        for row in session.query(
+            Filterset.id, Filterset.board_id, Filterset.filters_hash
+        ).filter(
+            db.tuple_(Filterset.board_id, Filterset.filters_hash).in_(list(pending))
+        ):
+            if row.id not in pending_ids:
+                raise ValueError(FILTERSET_DUPLICATE_MESSAGE)
 
 
 @event.listens_for(Filterset, 'before_update')
 @event.listens_for(Filterset, 'before_insert')
 def _format_and_validate(mapper, connection, target):
     with db.session.no_autoflush:
-        if target.geonameids:
-            target.geonameids = sorted(target.geonameids)
-
-        filterset = Filterset.from_filters(target.board, target.to_filters())
-        if filterset and filterset.id != target.id:
-            raise ValueError(
-                "There already exists a filter set with this filter criteria"
-            )
+        target.filters = target._current_filters()
+        # Duplicate criteria within a board are rejected by the unique constraint
+        target.filters_hash = Filterset.hash_filters(target.filters)
 
 
 create_geonameids_trigger = DDL(
@@ -1,4 +1,4 @@
-from flask import redirect, url_for
+from flask import redirect, request, url_for
 
 from .. import app
 from . import (  # noqa: F401
@@ -18,16 +18,29 @@ from . import (  # noqa: F401
     static,
 )
 
+#: Legacy paths that redirect to the home page
+ROOT_REDIRECT_PATHS = frozenset(
+    (
+        '/type/',
+        '/category/',
+        '/view/',
+        '/edit/',
+        '/confirm/',
+        '/withdraw/',
+        '/in/',
+        '/at/',
+        '/by/',
+        '/index.php',
+    )
+)
+
 
-@app.route('/type/')
-@app.route('/category/')
-@app.route('/view/')
-@app.route('/edit/')
-@app.route('/confirm/')
-@app.route('/withdraw/')
-@app.route('/in/')
-@app.route('/at/')
-@app.route('/by/')
-@app.route('/index.php')
-def root_paths():
-    return redirect(url_for('index'), code=302)
+@app.before_request
+def redirect_root_paths():
+    # Only on the root domain: board subdomains 404 on these paths
+    if (
+        request.method in ('GET', 'HEAD')
+        and request.path in ROOT_REDIRECT_PATHS
+        and request.host == app.config.get('SERVER_NAME')
+    ):
+        return redirect(url_for('index', subdomain=None), code=301)
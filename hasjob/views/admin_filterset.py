@@ -1,3 +1,5 @@
+from sqlalchemy.exc import IntegrityError
+
 from flask import abort, flash, g
 
 from baseframe import __
@@ -7,6 +9,14 @@ from coaster.views import ModelView, UrlForView, route, viewdata
 from .. import app
 from ..forms import FiltersetForm
 from ..models import Filterset, db
+from ..models.filterset import FILTERSET_CRITERIA_CONSTRAINT
+
+
+def is_duplicate_criteria(exc):
+    """Check if a failed commit was rejected for duplicating filter criteria"""
+    if isinstance(exc, IntegrityError):
+        return exc.orig.diag.constraint_name == FILTERSET_CRITERIA_CONSTRAINT
+    return True
 
 
 @route('/f')
@@ -25,15 +35,20 @@ class AdminFiltersetView(UrlForView, ModelView):
 
         form = FiltersetForm(parent=g.board)
         if form.validate_on_submit():
-            filterset = Filterset(board=g.board, title=form.title.data)
-            form.populate_obj(filterset)
             try:
+                # Tag and domain lookups in populate_obj must not flush a half-made
+                # filterset outside this try block
+                with db.session.no_autoflush:
+                    filterset = Filterset(board=g.board, title=form.title.data)
+                    form.populate_obj(filterset)
                 db.session.add(filterset)
                 db.session.commit()
                 flash("Created a filterset", 'success')
                 return render_redirect(filterset.url_for(), code=303)
-            except ValueError:
+            except (IntegrityError, ValueError) as exc:
                 db.session.rollback()
+                if not is_duplicate_criteria(exc):
+                    raise
                 flash(
                     "There already exists a filterset with the selected criteria",
                     'interactive',
@@ -54,13 +69,16 @@ class AdminFiltersetView(UrlForView, ModelView):
 
         form = FiltersetForm(obj=self.obj)
         if form.validate_on_submit():
-            form.populate_obj(self.obj)
             try:
+                with db.session.no_autoflush:
+                    form.populate_obj(self.obj)
                 db.session.commit()
                 flash("Updated filterset", 'success')
                 return render_redirect(self.obj.url_for(), code=303)
-            except ValueError:
+            except (IntegrityError, ValueError) as exc:
                 db.session.rollback()
+                if not is_duplicate_criteria(exc):
+                    raise
                 flash(
                     "There already exists a filterset with the selected criteria",
                     'interactive',
@@ -49,7 +49,7 @@ from ..utils import cointoss, redactemail, scrubemail
 
 gif1x1 = b64decode(b'R0lGODlhAQABAJAAAP8AAAAAACH5BAUQAAAALAAAAAABAAEAAAICBAEAOw==')
 MAX_COUNTS_KEY = 'maxcounts'
-ALLOWED_TAGS = ['strong', 'em', 'p', 'ol', 'ul', 'li', 'br', 'a']
+ALLOWED_TAGS = frozenset(('strong', 'em', 'p', 'ol', 'ul', 'li', 'br', 'a'))
 
 
 @app.route('/_sniffle.gif')
@@ -899,12 +899,24 @@ def browse_tags():
     )
 
 
+def filterset_load_options():
+    """
+    Loader options for filterset views. Filters are read from the stored column,
+    so only the board is loaded. In debug and testing, any other relationship
+    load raises, to catch N+1 query regressions early
+    """
+    options = [db.joinedload(Filterset.board)]
+    if app.debug or app.testing:
+        options.append(db.raiseload('*'))
+    return options
+
+
 # POST is required for pagination
 @app.route('/f/<name>', subdomain='<subdomain>', methods=['GET', 'POST'])
 @app.route('/f/<name>', methods=['GET', 'POST'])
 @Filterset.is_url_for('view')
 def filterset_view(name):
-    filterset = Filterset.get(g.board, name)
+    filterset = Filterset.get(g.board, name, options=filterset_load_options())
     if not filterset:
         abort(404)
     return index(
@@ -1150,14 +1162,20 @@ def sitemap(key):
         )
 
     # Add filtered views to sitemap
-    for item in Filterset.query.all():
+    for row in Filterset.url_rows():
         sitemapxml += (
             '  <url>\n'
             '    <loc>{url}</loc>\n'
             '    <lastmod>{updated_at}</lastmod>\n'
             '    <changefreq>daily</changefreq>\n'
             '  </url>\n'.format(
-                url=item.url_for(_external=True), updated_at=item.updated_at.isoformat()
+                url=url_for(
+                    'filterset_view',
+                    name=row.name,
+                    subdomain=row.board_name if row.not_root else None,
+                    _external=True,
+                ),
+                updated_at=row.updated_at.isoformat(),
             )
         )
 
@@ -0,0 +1,126 @@
+"""Store filterset filters and criteria hash
+
+Revision ID: 5c2e8d4a7f13
+Revises: a8f1e1c55a57
+Create Date: 2026-10-15 16:22:48.503117
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8d4a7f13'
+down_revision = 'a8f1e1c55a57'
+
+from collections import defaultdict
+import hashlib
+import json
+
+from alembic import op
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import column, table
+import sqlalchemy as sa
+
+filterset = table(
+    'filterset',
+    column('id', sa.Integer()),
+    column('geonameids', postgresql.ARRAY(sa.Integer())),
+    column('pay_currency', sa.CHAR(3)),
+    column('pay_cash', sa.Integer()),
+    column('equity', sa.Boolean()),
+    column('remote_location', sa.Boolean()),
+    column('keywords', sa.Unicode()),
+    column('filters', postgresql.JSONB()),
+    column('filters_hash', sa.CHAR(64)),
+)
+
+# (filter key, association table, association column, model table)
+name_tables = [
+    ('t', 'filterset_jobtype', 'jobtype_id', 'jobtype'),
+    ('c', 'filterset_jobcategory', 'jobcategory_id', 'jobcategory'),
+    ('k', 'filterset_tag', 'tag_id', 'tag'),
+    ('d', 'filterset_domain', 'domain_id', 'domain'),
+]
+
+indexed_columns = ['remote_location', 'pay_currency', 'pay_cash', 'equity', 'keywords']
+
+
+def filterset_names(conn, assoc_table, assoc_column, model_table):
+    assoc = table(assoc_table, column('filterset_id'), column(assoc_column))
+    model = table(model_table, column('id'), column('name'))
+    names = defaultdict(list)
+    for row in conn.execute(
+        sa.select([assoc.c.filterset_id, model.c.name]).select_from(
+            assoc.join(model, model.c.id == assoc.c[assoc_column])
+        )
+    ):
+        names[row.filterset_id].append(row.name)
+    return names
+
+
+def hash_filters(filters):
+    # Same as Filterset.hash_filters at the time of this migration
+    criteria = dict(
+        filters,
+        equity=bool(filters['equity']),
+        anywhere=bool(filters['anywhere']),
+        q=filters['q'] or '',
+    )
+    return hashlib.sha256(
+        json.dumps(criteria, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+def upgrade():
+    op.add_column('filterset', sa.Column('filters', postgresql.JSONB(), nullable=True))
+    op.add_column('filterset', sa.Column('filters_hash', sa.CHAR(64), nullable=True))
+
+    conn = op.get_bind()
+    names = {
+        key: filterset_names(conn, assoc_table, assoc_column, model_table)
+        for key, assoc_table, assoc_column, model_table in name_tables
+    }
+    for row in conn.execute(sa.select([filterset])):
+        # Same as Filterset._current_filters at the time of this migration
+        filters = {key: sorted(names[key][row.id]) for key in names}
+        filters.update(
+            {
+                'l': sorted(row.geonameids or []),
+                'currency': row.pay_currency,
+                'pay': row.pay_cash,
+                'equity': row.equity,
+                'anywhere': row.remote_location,
+                'q': row.keywords,
+            }
+        )
+        conn.execute(
+            filterset.update()
+            .where(filterset.c.id == row.id)
+            .values(filters=filters, filters_hash=hash_filters(filters))
+        )
+
+    op.alter_column('filterset', 'filters', nullable=False)
+    op.alter_column('filterset', 'filters_hash', nullable=False)
+    op.create_unique_constraint(
+        'filterset_board_id_filters_hash_key',
+        'filterset',
+        ['board_id', 'filters_hash'],
+        deferrable=True,
+        initially='DEFERRED',
+    )
+    # Lookups go by filters_hash now
+    for column_name in indexed_columns:
+        op.drop_index(op.f('ix_filterset_' + column_name), table_name='filterset')
+
+
+def downgrade():
+    for column_name in reversed(indexed_columns):
+        op.create_index(
+            op.f('ix_filterset_' + column_name),
+            'filterset',
+            [column_name],
+            unique=False,
+        )
+    op.drop_constraint(
+        'filterset_board_id_filters_hash_key', 'filterset', type_='unique'
+    )
+    op.drop_column('filterset', 'filters_hash')
+    op.drop_column('filterset', 'filters')
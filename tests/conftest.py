@@ -37,3 +37,21 @@ def test_db(test_client):
 @pytest.fixture(scope='session')
 def pil_init():
     Image.init()
+
+
+@pytest.fixture()
+def board(test_db):
+    from hasjob.models import Board, Filterset
+
+    board = Board.query.filter_by(name='www').first()
+    if board is None:
+        board = Board(name='www', title="Hasjob", userid='test-board-owner')
+        test_db.session.add(board)
+        test_db.session.commit()
+
+    yield board
+
+    test_db.session.rollback()
+    for filterset in Filterset.query.all():
+        test_db.session.delete(filterset)
+    test_db.session.commit()
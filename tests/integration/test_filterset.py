@@ -0,0 +1,126 @@
+import pytest
+
+from hasjob import app
+from hasjob.models import Board, Filterset
+
+
+class TestFilterset:
+    def test_get_after_rename(self, test_db, board):
+        filterset = Filterset(
+            board=board, name='python-jobs', title="Python jobs", keywords='python'
+        )
+        test_db.session.add(filterset)
+        test_db.session.commit()
+        assert Filterset.get(board, 'python-jobs') == filterset
+
+        filterset.name = 'python-developer-jobs'
+        test_db.session.commit()
+        # A renamed filterset is not found by its old name
+        assert Filterset.get(board, 'python-jobs') is None
+        assert Filterset.get(board, 'python-developer-jobs') == filterset
+
+    def test_duplicate_within_commit(self, test_db, board):
+        test_db.session.add_all(
+            [
+                Filterset(
+                    board=board, name='python', title="Python", keywords='python'
+                ),
+                Filterset(board=board, name='py', title="Py", keywords='python'),
+            ]
+        )
+        with pytest.raises(ValueError):
+            test_db.session.commit()
+
+    def test_duplicate_of_existing(self, test_db, board):
+        test_db.session.add(
+            Filterset(board=board, name='python', title="Python", keywords='python')
+        )
+        test_db.session.commit()
+
+        test_db.session.add(
+            Filterset(board=board, name='py', title="Py", keywords='python')
+        )
+        with pytest.raises(ValueError):
+            test_db.session.commit()
+
+        test_db.session.rollback()
+        existing = Filterset.get(board, 'python')
+        existing.title = "Python jobs"
+        # Saving a filterset without changing its criteria is not a duplicate
+        test_db.session.commit()
+
+    def test_pay_thresholds(self, test_db, board):
+        # Filtersets that differ only in minimum pay list different jobs
+        test_db.session.add_all(
+            [
+                Filterset(
+                    board=board, name='python', title="Python", keywords='python'
+                ),
+                Filterset(
+                    board=board,
+                    name='python-50k',
+                    title="Python 50k",
+                    keywords='python',
+                    pay_cash=50000,
+                ),
+                Filterset(
+                    board=board,
+                    name='python-100k',
+                    title="Python 100k",
+                    keywords='python',
+                    pay_cash=100000,
+                ),
+            ]
+        )
+        test_db.session.commit()
+        assert Filterset.query.filter_by(board=board).count() == 3
+
+    def test_swap_criteria(self, test_db, board):
+        python = Filterset(
+            board=board, name='python', title="Python", keywords='python'
+        )
+        ruby = Filterset(board=board, name='ruby', title="Ruby", keywords='ruby')
+        test_db.session.add_all([python, ruby])
+        test_db.session.commit()
+
+        python.keywords = 'ruby'
+        ruby.keywords = 'python'
+        test_db.session.commit()
+        assert Filterset.from_filters(board, python.to_filters()) == python
+        assert Filterset.from_filters(board, ruby.to_filters()) == ruby
+
+
+class TestAdminFiltersetView:
+    @pytest.fixture()
+    def client(self, test_client, board, monkeypatch):
+        monkeypatch.setitem(app.config, 'WTF_CSRF_ENABLED', False)
+        monkeypatch.setattr(
+            Board, 'permissions', lambda self, user, inherited=None: {'edit-filterset'}
+        )
+        with test_client as c:
+            yield c
+
+    def post_filterset(self, client, url, title, keywords):
+        return client.post(
+            url,
+            data={'title': title, 'description': title, 'keywords': keywords},
+        )
+
+    def test_new_duplicate(self, client, test_db, board):
+        resp = self.post_filterset(client, '/f/new', "Python", 'python')
+        assert resp.status_code == 303
+
+        resp = self.post_filterset(client, '/f/new', "Python jobs", 'python')
+        # The form is shown again instead of saving a duplicate
+        assert resp.status_code == 200
+        assert Filterset.query.filter_by(board=board).count() == 1
+
+    def test_edit_duplicate(self, client, test_db, board):
+        self.post_filterset(client, '/f/new', "Python", 'python')
+        self.post_filterset(client, '/f/new', "Ruby", 'ruby')
+        ruby = Filterset.query.filter_by(board=board, keywords='ruby').one()
+
+        resp = self.post_filterset(client, f'/f/{ruby.name}/edit', "Ruby", 'python')
+        assert resp.status_code == 200
+        test_db.session.refresh(ruby)
+        assert ruby.keywords == 'ruby'
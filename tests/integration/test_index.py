@@ -1,8 +1,24 @@
 from flask import url_for
 
+from hasjob.views import ROOT_REDIRECT_PATHS
+
 
 class TestIndexView:
     def test_index(self, test_client, test_db):
         with test_client as c:
             resp = c.get(url_for('index', subdomain=None))
             assert "Hasjob" in resp.data.decode('utf-8')
+
+    def test_root_redirect_paths(self, test_client, test_db, board):
+        with test_client as c:
+            for path in ROOT_REDIRECT_PATHS:
+                resp = c.get(path)
+                assert resp.status_code == 301
+                assert resp.location == url_for('index', subdomain=None, _external=True)
+
+            # Only GET and HEAD are redirected, and only on the root domain
+            assert c.post('/index.php').status_code != 301
+            resp = c.get(
+                '/index.php', base_url='http://nosuchboard.hasjob.travis.local:5000'
+            )
+            assert resp.status_code == 404
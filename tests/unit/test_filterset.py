@@ -0,0 +1,69 @@
+from sqlalchemy.orm import make_transient_to_detached
+
+from hasjob.models import Filterset
+from hasjob.models.filterset import _format_and_validate
+
+
+class TestFilterset:
+    def test_pay_only_to_filters(self, test_client):
+        filterset = Filterset(pay_cash=50000, pay_currency=None)
+        # Store the filters as the insert hook does
+        _format_and_validate(None, None, filterset)
+        assert filterset.filters['pay'] == 50000
+
+        filters = filterset.to_filters()
+        assert filters['pay'] == 50000
+        assert filters['currency'] is None
+
+    def test_to_filters_unflushed_changes(self, test_client):
+        filterset = Filterset(id=1, keywords='python', pay_cash=50000)
+        _format_and_validate(None, None, filterset)
+        # Mark the stored state as loaded from the database
+        make_transient_to_detached(filterset)
+        assert filterset.to_filters()['q'] == 'python'
+
+        filterset.keywords = 'django'
+        filterset.pay_cash = 100000
+        # Changes not yet flushed are reflected instead of the stored filters
+        filters = filterset.to_filters()
+        assert filters['q'] == 'django'
+        assert filters['pay'] == 100000
+
+    def test_hash_filters_equivalent(self, test_client):
+        # Missing values hash the same as their defaults
+        assert Filterset.hash_filters({}) == Filterset.hash_filters(
+            {
+                't': [],
+                'c': [],
+                'k': [],
+                'd': [],
+                'l': [],
+                'currency': None,
+                'pay': None,
+                'equity': None,
+                'anywhere': False,
+                'q': None,
+            }
+        )
+        assert Filterset.hash_filters({'q': 'python'}) != Filterset.hash_filters({})
+
+    def test_hash_filters_list_order(self, test_client):
+        assert Filterset.canonical_filters({'k': ['python', 'django']})['k'] == [
+            'django',
+            'python',
+        ]
+        assert Filterset.hash_filters(
+            {'k': ['python', 'django'], 'l': [1277333, 1275339]}
+        ) == Filterset.hash_filters(
+            {'k': ['django', 'python'], 'l': [1275339, 1277333]}
+        )
+
+    def test_hash_filters_pay_only(self, test_client):
+        # The filterset view filters on pay without a currency, so it counts
+        assert Filterset.hash_filters({'pay': 50000}) != Filterset.hash_filters({})
+        assert Filterset.hash_filters({'pay': 50000}) != Filterset.hash_filters(
+            {'pay': 100000}
+        )
+        assert Filterset.hash_filters(
+            {'pay': 50000, 'currency': 'INR'}
+        ) != Filterset.hash_filters({'pay': 50000})